@@ -1,63 +1,317 @@
+import itertools
+import logging
+import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Optional
 
 import dash
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import schedule
-from dash import Input, Output, dcc, html, dash_table, callback_context
+from dash import Input, Output, Patch, State, dcc, html, dash_table, callback_context, no_update
+from flask_caching import Cache
 
-from config import DASHBOARD_TITLE, UPDATE_INTERVAL_HOURS
-from sam_api import EnhancedSAMAfricaAPI, update_comprehensive_africa_data, create_enhanced_sample_data
+from config import DASHBOARD_TITLE, DEFER_SCHEDULER, LOG_FORMAT, LOG_LEVEL, SCHEDULER_LEADER, UPDATE_INTERVAL_HOURS
+from sam_api import (
+    SNAPSHOT_PATH,
+    begin_sync,
+    create_enhanced_sample_data,
+    end_sync,
+    get_api,
+    parse_dates,
+    read_sync_state,
+    sync_in_progress,
+    update_comprehensive_africa_data,
+)
 
 # --------------------------------------------------------------- #
 # ENHANCED PRODUCTION DATA LOADING                               #
 # --------------------------------------------------------------- #
 
-sam_api = EnhancedSAMAfricaAPI()
+logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+sam_api = get_api()
+
+# Low-cardinality columns that the callbacks filter and count on
+CATEGORICAL_COLUMNS = ("african_country", "department", "notice_type")
+DATE_COLUMNS = ("posted_date", "response_date")
+# Free-text columns, stored as contiguous Arrow strings instead of Python objects
+TEXT_COLUMNS = ("title", "description", "sam_url", "award_amount")
+# Preformatted display columns and the opportunities table column each one feeds
+TABLE_FIELDS = {
+    "title_display": "Title",
+    "department_display": "Agency",
+    "country_display": "Country",
+    "posted_display": "Posted Date",
+    "response_display": "Response Due",
+    "award_display": "Award Amount",
+    "link_display": "SAM.gov Link",
+}
+
+def parse_amounts(series: pd.Series) -> pd.Series:
+    """Parse award amounts like "$1,250,000" to floats, coercing blanks and junk to NaN."""
+    values = series.astype("string[pyarrow]").str.replace(r"[$,]", "", regex=True)
+    return pd.to_numeric(values, errors="coerce")
+
+def truncate_text(series: pd.Series, width: int) -> pd.Series:
+    """Cut strings longer than width characters and mark the cut with an ellipsis."""
+    text = series.astype("string[pyarrow]").fillna("")
+    return text.where(text.str.len() <= width, text.str.slice(0, width) + "...")
+
+def prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert loaded data to the dtypes used by the dashboard callbacks."""
+    if df.empty:
+        return df
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype("category")
+    df["is_active"] = df["is_active"].fillna(0).astype("int8")
+    for col in TEXT_COLUMNS:
+        df[col] = df[col].astype("string[pyarrow]")
+    for col in DATE_COLUMNS:
+        df[col] = parse_dates(df[col])
+    df["award_value"] = parse_amounts(df["award_amount"])
+    # Month bucket for the timeline chart
+    df["posted_month"] = df["posted_date"].to_numpy().astype("datetime64[M]")
+    # Display strings for the opportunities table
+    df["title_display"] = truncate_text(df["title"], 100)
+    df["department_display"] = truncate_text(df["department"], 50)
+    df["country_display"] = df["african_country"].astype(str)
+    for col, display_col in (("posted_date", "posted_display"), ("response_date", "response_display")):
+        df[display_col] = df[col].dt.strftime("%Y-%m-%d").fillna("")
+    award_amount = df["award_amount"]
+    # Missing awards are stored as "" (older syncs wrote "None" or "nan")
+    disclosed = award_amount.notna() & ~award_amount.isin(["", "nan", "None"])
+    df["award_display"] = award_amount.where(disclosed, "Not Disclosed")
+    sam_url = df["sam_url"].fillna("")
+    df["link_display"] = ("[View Opportunity](" + sam_url + ")").where(sam_url != "", "N/A")
+    # Newest first, so the tables only need head() instead of a sort per callback
+    return df.sort_values("posted_date", ascending=False, kind="stable", na_position="last", ignore_index=True)
 
-def load_all_data() -> tuple[pd.DataFrame, pd.DataFrame]:
-    """Load both active and historical data."""
+def load_all_data() -> pd.DataFrame:
+    """Load both active and historical data as a single frame."""
     try:
         # Load all data from database
         all_df = sam_api.load_from_database(active_only=False)
         
         if all_df.empty:
-            print("[INFO] No existing data found. Creating sample data...")
-            all_df = create_enhanced_sample_data()
+            # Saves are upserts, so sample rows are only seeded into an empty database;
+            # an empty load of a populated one is a read error and shows them unsaved
+            logger.info("No existing data found. Creating sample data...")
+            all_df = create_enhanced_sample_data(save=not sam_api.has_opportunities())
         
-        # Split into active and historical
-        active_df = all_df[all_df['is_active'] == 1].copy() if not all_df.empty else pd.DataFrame()
-        historical_df = all_df[all_df['is_active'] == 0].copy() if not all_df.empty else pd.DataFrame()
+        all_df = prepare_frame(all_df)
         
-        print(f"[INFO] Loaded {len(active_df)} active and {len(historical_df)} historical opportunities")
-        return active_df, historical_df
+        active_count = int((all_df["is_active"].to_numpy() == 1).sum()) if not all_df.empty else 0
+        logger.info("Loaded %d active and %d historical opportunities", active_count, len(all_df) - active_count)
+        return all_df
         
     except Exception as exc:
-        print(f"[ERROR] Critical error in load_all_data: {exc}")
-        sample_df = create_enhanced_sample_data()
-        active_df = sample_df[sample_df['is_active'] == 1].copy()
-        historical_df = sample_df[sample_df['is_active'] == 0].copy()
-        return active_df, historical_df
+        logger.error("Critical error in load_all_data: %s", exc)
+        return prepare_frame(create_enhanced_sample_data(save=False))
+
+@dataclass
+class DashboardCache:
+    """Opportunity frames plus statistics and filter options precomputed once per data load."""
+    version: int
+    all_df: pd.DataFrame
+    # Row masks per status filter value; None selects every row
+    status_masks: Dict[str, Optional[np.ndarray]]
+    total: int
+    active: int
+    historical: int
+    total_value: float
+    country_options: List[Dict[str, str]]
+    agency_options: List[Dict[str, str]]
+    type_options: List[Dict[str, str]]
+    # Unfiltered chart counts per status filter value
+    top_countries: Dict[str, pd.Series]
+    top_agencies: Dict[str, pd.Series]
+
+_cache_versions = itertools.count(1)
+
+def _filter_options(series: pd.Series) -> List[Dict[str, str]]:
+    """Build sorted dropdown options from the categories of a categorical column."""
+    # Categories are already unique, sorted and free of missing values
+    values = series.cat.categories.to_numpy()
+    values = values[values != "nan"]
+    return [{"label": v, "value": v} for v in values]
+
+def _top_counts(series: pd.Series, k: int) -> pd.Series:
+    """Return the k most frequent values of a categorical column, ties in category order."""
+    codes = series.cat.codes.to_numpy()
+    counts = np.bincount(codes[codes >= 0], minlength=len(series.cat.categories))
+    k = min(k, np.count_nonzero(counts))
+    if k == 0:
+        return pd.Series(dtype="int64")
+    top = np.argpartition(counts, -k)[-k:]
+    top = top[np.lexsort((top, -counts[top]))]
+    return pd.Series(counts[top], index=series.cat.categories[top])
+
+def build_dashboard_cache(all_df: pd.DataFrame) -> DashboardCache:
+    """Precompute the statistics and filter options shown by the dashboard."""
+    version = next(_cache_versions)
+    
+    if all_df.empty:
+        no_rows = np.zeros(0, dtype=bool)
+        status_masks = {"active": no_rows, "historical": no_rows, "all": None}
+        return DashboardCache(version, all_df, status_masks, 0, 0, 0, 0.0, [], [], [], {}, {})
+    
+    # Calculate total contract value (award amounts are parsed at load)
+    total_value = float(all_df["award_value"].sum())
+    
+    active_mask = all_df["is_active"].to_numpy() == 1
+    status_masks = {"active": active_mask, "historical": ~active_mask, "all": None}
+    active = int(active_mask.sum())
+    
+    def status_column(column: str, status: str) -> pd.Series:
+        mask = status_masks[status]
+        return all_df[column] if mask is None else all_df[column][mask]
+    
+    return DashboardCache(
+        version=version,
+        all_df=all_df,
+        status_masks=status_masks,
+        total=len(all_df),
+        active=active,
+        historical=len(all_df) - active,
+        total_value=total_value,
+        country_options=_filter_options(all_df["african_country"]),
+        agency_options=_filter_options(all_df["department"]),
+        type_options=_filter_options(all_df["notice_type"]),
+        top_countries={status: _top_counts(status_column("african_country", status), 15) for status in status_masks},
+        top_agencies={status: _top_counts(status_column("department", status), 10) for status in status_masks},
+    )
+
+def filter_mask(df: pd.DataFrame, selected_countries, selected_agencies, selected_types,
+                base: Optional[np.ndarray] = None) -> np.ndarray:
+    """Combine the dropdown selections (and an optional status mask) into a single boolean row mask."""
+    mask = np.ones(len(df), dtype=bool) if base is None else base.copy()
+    if selected_countries:
+        mask &= df["african_country"].isin(selected_countries).to_numpy()
+    if selected_agencies:
+        mask &= df["department"].isin(selected_agencies).to_numpy()
+    if selected_types:
+        mask &= df["notice_type"].isin(selected_types).to_numpy()
+    return mask
+
+# Frames and statistics are swapped together so a callback never mixes two loads
+_data_lock = threading.RLock()
+_dashboard_cache: Optional[DashboardCache] = None
+# Snapshot mtime the current load saw; held by one thread while it reloads
+_loaded_marker: Optional[int] = None
+_reload_lock = threading.Lock()
+
+def _data_marker() -> Optional[int]:
+    """Return the Parquet snapshot's mtime, which every save rewrites, or None if there is none."""
+    try:
+        return os.stat(SNAPSHOT_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+def get_dashboard_cache() -> DashboardCache:
+    """Return the current data load; callbacks read it once and reuse the reference.
+    
+    Each server process holds its own load, so one that sees the snapshot
+    rewritten by another (a sync, a refresh) reloads. Other callbacks keep
+    getting the previous load until it is ready.
+    """
+    with _data_lock:
+        cache, marker = _dashboard_cache, _loaded_marker
+    if marker != _data_marker() and _reload_lock.acquire(blocking=False):
+        try:
+            cache = refresh_data()
+        finally:
+            _reload_lock.release()
+    return cache
+
+def refresh_data() -> DashboardCache:
+    """Reload opportunities from storage and rebuild the dashboard cache."""
+    global _dashboard_cache, _loaded_marker
+    # Read before loading, so a save that lands mid-load triggers another reload
+    marker = _data_marker()
+    new_cache = build_dashboard_cache(load_all_data())
+    with _data_lock:
+        _dashboard_cache, _loaded_marker = new_cache, marker
+    return new_cache
+
+def run_historical_sync(sync_id: Optional[str] = None) -> Optional[DashboardCache]:
+    """Run the comprehensive SAM.gov collection, then reload the dashboard data.
+    
+    Only one sync runs at a time across all processes. Callers that have not
+    already claimed the lock with begin_sync are skipped while another runs.
+    """
+    if sync_id is None:
+        sync_id = begin_sync()
+        if sync_id is None:
+            logger.info("Historical sync already running in another process, skipping")
+            return None
+    
+    try:
+        saved = update_comprehensive_africa_data()
+    except Exception as e:
+        logger.error("Historical sync failed: %s", e)
+        end_sync(sync_id, "failed")
+        raise
+    end_sync(sync_id, "done", saved)
+    return refresh_data()
+
+# Historical syncs started from the dashboard run here so the callback can
+# return straight away; the page polls the shared sync state for the outcome
+_sync_executor = ThreadPoolExecutor(max_workers=1)
 
 # Initialize data
-active_opportunities_df, historical_opportunities_df = load_all_data()
+refresh_data()
 
 # --------------------------------------------------------------- #
 # ENHANCED DASH APP SETUP                                       #
 # --------------------------------------------------------------- #
 
+# Dash encodes every layout and callback response through plotly's JSON engine;
+# pin it to orjson so a missing install fails loudly instead of falling back to json
+pio.json.config.default_engine = "orjson"
+
 app = dash.Dash(__name__)
 app.title = DASHBOARD_TITLE
 server = app.server
 
+# Per-process memo cache for callback results; keys include the data version,
+# so entries are never served for a different load than the one they were built from
+cache = Cache(server, config={
+    "CACHE_TYPE": "SimpleCache",
+    "CACHE_DEFAULT_TIMEOUT": UPDATE_INTERVAL_HOURS * 3600,
+})
+
+def _filter_key(values: Optional[List[str]]) -> tuple:
+    """Normalize a dropdown selection into an order-independent cache key."""
+    return tuple(sorted(values)) if values else ()
+
 # --------------------------------------------------------------- #
 # ENHANCED DASHBOARD LAYOUT                                     #
 # --------------------------------------------------------------- #
 
+# Starting figure for every chart; it carries the plotly template, which the
+# chart callbacks then leave in place and never send again
+_BASE_FIGURE = go.Figure().to_plotly_json()
+
+# Opportunities table columns (SAM.gov links render as markdown)
+TABLE_COLUMNS = [
+    {"name": "Title", "id": "Title"},
+    {"name": "Agency", "id": "Agency"},
+    {"name": "Country", "id": "Country"},
+    {"name": "Posted Date", "id": "Posted Date"},
+    {"name": "Response Due", "id": "Response Due"},
+    {"name": "Award Amount", "id": "Award Amount"},
+    {"name": "SAM.gov Link", "id": "SAM.gov Link", "type": "text", "presentation": "markdown"},
+]
+
 app.layout = html.Div([
     # Enhanced Header Section
     html.Div([
@@ -71,6 +325,12 @@ app.layout = html.Div([
             html.Button("Full Historical Sync", id="historical-sync-btn", className="historical-button"),
         ], className="button-container"),
         html.Div(id="sync-status", className="sync-status"),
+        # Polls for the outcome of a running historical sync
+        dcc.Interval(id="sync-poll", interval=5000, disabled=True),
+        # Id of the historical sync this page started or joined
+        dcc.Store(id="sync-id"),
+        # Dashboard cache version; bumps whenever the data is reloaded
+        dcc.Store(id="data-version", data=0),
     ], className="header"),
     
     # Main Content
@@ -154,14 +414,14 @@ app.layout = html.Div([
         
         # Enhanced Charts Row 1
         html.Div([
-            html.Div([dcc.Graph(id="country-chart")], className="chart-container"),
-            html.Div([dcc.Graph(id="agency-chart")], className="chart-container"),
+            html.Div([dcc.Graph(id="country-chart", figure=_BASE_FIGURE)], className="chart-container"),
+            html.Div([dcc.Graph(id="agency-chart", figure=_BASE_FIGURE)], className="chart-container"),
         ], className="charts-row"),
         
         # Enhanced Charts Row 2
         html.Div([
-            html.Div([dcc.Graph(id="timeline-chart")], className="chart-container"),
-            html.Div([dcc.Graph(id="value-chart")], className="chart-container"),
+            html.Div([dcc.Graph(id="timeline-chart", figure=_BASE_FIGURE)], className="chart-container"),
+            html.Div([dcc.Graph(id="value-chart", figure=_BASE_FIGURE)], className="chart-container"),
         ], className="charts-row"),
         
         # Tabbed Tables Section
@@ -170,7 +430,40 @@ app.layout = html.Div([
                 dcc.Tab(label="Recent/Active Opportunities", value="recent"),
                 dcc.Tab(label="Historical Database", value="historical"),
             ]),
-            html.Div(id="tables-content"),
+            html.H3(id="tables-title", className="section-title"),
+            html.P(id="tables-message", className="no-data-message"),
+            dash_table.DataTable(
+                id="opportunities-table",
+                columns=TABLE_COLUMNS,
+                data=[],
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '12px',
+                    'fontFamily': 'Arial',
+                    'fontSize': '14px',
+                    'maxWidth': '300px',
+                    'overflow': 'hidden',
+                    'textOverflow': 'ellipsis',
+                },
+                style_header={
+                    'backgroundColor': '#f8f9fa',
+                    'fontWeight': 'bold',
+                    'border': '1px solid #dee2e6'
+                },
+                style_data={
+                    'border': '1px solid #dee2e6'
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': '#f8f9fa'
+                    }
+                ],
+                page_size=25,
+                sort_action="native",
+                filter_action="native",
+                export_format="csv",
+            ),
         ], className="tables-container"),
         
     ], className="main-content"),
@@ -192,82 +485,86 @@ app.layout = html.Div([
         Output("agency-filter", "options"),
         Output("type-filter", "options"),
         Output("sync-status", "children"),
+        Output("data-version", "data"),
+        Output("sync-poll", "disabled"),
+        Output("sync-id", "data"),
     ],
     [
         Input("refresh-btn", "n_clicks"),
         Input("historical-sync-btn", "n_clicks"),
+        Input("sync-poll", "n_intervals"),
     ],
+    [State("sync-id", "data")],
 )
-def update_stats_and_filters(refresh_clicks: Optional[int], sync_clicks: Optional[int]):
+def update_stats_and_filters(
+    refresh_clicks: Optional[int],
+    sync_clicks: Optional[int],
+    poll_intervals: Optional[int],
+    current_sync_id: Optional[str],
+):
     """Update dashboard statistics and filter options with enhanced features."""
-    global active_opportunities_df, historical_opportunities_df
-    
     ctx = callback_context
     status_message = ""
+    poll_disabled = True
+    sync_id = no_update
     
     if ctx.triggered:
         button_id = ctx.triggered[0]['prop_id'].split('.')[0]
         
         if button_id == "refresh-btn" and refresh_clicks and refresh_clicks > 0:
-            print("[INFO] Manual refresh triggered")
+            logger.info("Manual refresh triggered")
             status_message = "Refreshing current data..."
             try:
-                active_opportunities_df, historical_opportunities_df = load_all_data()
+                refresh_data()
                 status_message = "✅ Current data refreshed successfully!"
             except Exception as e:
-                print(f"[ERROR] Refresh failed: {e}")
+                logger.error("Refresh failed: %s", e)
                 status_message = "❌ Refresh failed. Using cached data."
         
         elif button_id == "historical-sync-btn" and sync_clicks and sync_clicks > 0:
-            print("[INFO] Historical sync triggered")
-            status_message = "🔄 Starting comprehensive historical data collection... This may take several minutes."
-            try:
-                update_comprehensive_africa_data()
-                active_opportunities_df, historical_opportunities_df = load_all_data()
-                status_message = f"✅ Historical sync complete! Collected {len(active_opportunities_df) + len(historical_opportunities_df)} total opportunities."
-            except Exception as e:
-                print(f"[ERROR] Historical sync failed: {e}")
+            # The lock is shared by all workers and the daily job, so only one sync runs anywhere
+            sync_id = begin_sync()
+            if sync_id is None:
+                status_message = "🔄 Historical sync already in progress..."
+                sync_id = read_sync_state().get("id")
+            else:
+                logger.info("Historical sync triggered")
+                _sync_executor.submit(run_historical_sync, sync_id)
+                status_message = "🔄 Starting comprehensive historical data collection... This may take several minutes."
+            poll_disabled = False
+        
+        elif button_id == "sync-poll":
+            # Keep polling while the sync runs; it may be running in another process
+            if sync_in_progress():
+                return (no_update,) * 13
+            state = read_sync_state()
+            if state.get("id") == current_sync_id and state.get("status") != "done":
                 status_message = "❌ Historical sync failed. Please try again later."
+            else:
+                # Another process may have written the data, so reload this worker's copy
+                refresh_data()
+                status_message = f"✅ Historical sync complete! Collected {get_dashboard_cache().total} total opportunities."
     
-    # Combine dataframes for statistics
-    all_df = pd.concat([active_opportunities_df, historical_opportunities_df], ignore_index=True)
-    
-    if all_df.empty:
-        return "0", "0", "0", "0", "0", "$0", [], [], [], status_message
-    
-    # Calculate enhanced statistics
-    total_opps = len(all_df)
-    active_opps = len(active_opportunities_df)
-    historical_opps = len(historical_opportunities_df)
-    
-    # Calculate total contract value (parse award amounts)
-    total_value = 0
-    for amount_str in all_df['award_amount'].dropna():
-        amount_str = str(amount_str).replace('$', '').replace(',', '')
-        try:
-            if amount_str and amount_str != 'nan' and amount_str != '':
-                total_value += float(amount_str)
-        except (ValueError, TypeError):
-            continue
-    
-    total_value_str = f"${total_value:,.0f}" if total_value > 0 else "Not Available"
+    cache = get_dashboard_cache()
+    if cache.total == 0:
+        return "0", "0", "0", "0", "0", "$0", [], [], [], status_message, cache.version, poll_disabled, sync_id
     
-    # Unique values for filters
-    countries = sorted([c for c in all_df["african_country"].dropna().unique() if c != "nan"])
-    agencies = sorted([a for a in all_df["department"].dropna().unique() if a != "nan"])
-    notice_types = sorted([n for n in all_df["notice_type"].dropna().unique() if n != "nan"])
+    total_value_str = f"${cache.total_value:,.0f}" if cache.total_value > 0 else "Not Available"
     
     return (
-        f"{total_opps:,}",
-        f"{active_opps:,}",
-        f"{historical_opps:,}",
-        f"{len(countries):,}",
-        f"{len(agencies):,}",
+        f"{cache.total:,}",
+        f"{cache.active:,}",
+        f"{cache.historical:,}",
+        f"{len(cache.country_options):,}",
+        f"{len(cache.agency_options):,}",
         total_value_str,
-        [{"label": c, "value": c} for c in countries],
-        [{"label": a, "value": a} for a in agencies],
-        [{"label": t, "value": t} for t in notice_types],
+        cache.country_options,
+        cache.agency_options,
+        cache.type_options,
         status_message,
+        cache.version,
+        poll_disabled,
+        sync_id,
     )
 
 
@@ -283,40 +580,79 @@ def update_stats_and_filters(refresh_clicks: Optional[int], sync_clicks: Optiona
         Input("agency-filter", "value"),
         Input("type-filter", "value"),
         Input("status-filter", "value"),
+        Input("data-version", "data"),
     ],
 )
-def update_charts(selected_countries, selected_agencies, selected_types, status_filter):
+def update_charts(selected_countries, selected_agencies, selected_types, status_filter, data_version):
     """Update all charts based on filter selections."""
-    global active_opportunities_df, historical_opportunities_df
-    
-    # Select data based on status filter
-    if status_filter == "active":
-        df = active_opportunities_df.copy()
-    elif status_filter == "historical":
-        df = historical_opportunities_df.copy()
-    else:  # "all"
-        df = pd.concat([active_opportunities_df, historical_opportunities_df], ignore_index=True)
+    # data_version only triggers the update; the memo key uses this process's own
+    # load, since versions are numbered per process and workers reload independently
+    figures = build_charts(
+        get_dashboard_cache().version,
+        status_filter,
+        _filter_key(selected_countries),
+        _filter_key(selected_agencies),
+        _filter_key(selected_types),
+    )
+    return tuple(figure_patch(fig) for fig in figures)
+
+
+def plain_figure(fig: go.Figure) -> Dict:
+    """Convert a figure to a plain dict without its template."""
+    figure = fig.to_plotly_json()
+    figure["layout"].pop("template", None)
+    return figure
+
+# Layout keys some chart figures set and others do not; a patch must remove them
+# when the new figure lacks them (e.g. the annotation of an empty placeholder)
+_CHART_LAYOUT_KEYS = frozenset({
+    "annotations", "barmode", "coloraxis", "height", "legend", "piecolorway",
+    "showlegend", "title", "uirevision", "xaxis", "yaxis",
+})
+
+def figure_patch(figure: Dict) -> Patch:
+    """Patch a chart to show figure while keeping the template already on the client."""
+    patch = Patch()
+    patch["data"] = figure["data"]
+    layout = figure["layout"]
+    for key, value in layout.items():
+        patch["layout"][key] = value
+    for key in sorted(_CHART_LAYOUT_KEYS - layout.keys()):
+        del patch["layout"][key]
+    return patch
+
+# Placeholder figure for filter selections with no matching rows
+_EMPTY_FIG = plain_figure(go.Figure().add_annotation(
+    text="No data available for selected filters",
+    x=0.5, y=0.5,
+    showarrow=False,
+    font=dict(size=16)
+))
+
+
+@cache.memoize()
+def build_charts(version: int, status_filter, selected_countries, selected_agencies, selected_types):
+    """Build the chart figures for one data version and filter selection."""
+    data = get_dashboard_cache()
     
-    # Apply filters
-    if selected_countries:
-        df = df[df["african_country"].isin(selected_countries)]
-    if selected_agencies:
-        df = df[df["department"].isin(selected_agencies)]
-    if selected_types:
-        df = df[df["notice_type"].isin(selected_types)]
+    # Select data based on status filter, then apply filters, in a single row selection
+    status_key = status_filter if status_filter in ("active", "historical") else "all"
+    df = data.all_df
+    df = df.loc[filter_mask(df, selected_countries, selected_agencies, selected_types, data.status_masks[status_key])]
     
     # Handle empty dataset
     if df.empty:
-        empty_fig = go.Figure().add_annotation(
-            text="No data available for selected filters",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16)
-        )
-        return empty_fig, empty_fig, empty_fig, empty_fig
+        return _EMPTY_FIG, _EMPTY_FIG, _EMPTY_FIG, _EMPTY_FIG
+    
+    # The unfiltered view uses the counts precomputed at load time
+    if not (selected_countries or selected_agencies or selected_types):
+        country_counts = data.top_countries[status_key]
+        agency_counts = data.top_agencies[status_key]
+    else:
+        country_counts = _top_counts(df["african_country"], 15)
+        agency_counts = _top_counts(df["department"], 10)
     
     # Enhanced Country Chart
-    country_counts = df["african_country"].value_counts().head(15)
     country_fig = px.bar(
         x=country_counts.values,
         y=country_counts.index,
@@ -326,35 +662,32 @@ def update_charts(selected_countries, selected_agencies, selected_types, status_
         color=country_counts.values,
         color_continuous_scale="Blues"
     )
-    country_fig.update_layout(height=500, showlegend=False)
+    country_fig.update_layout(height=500, showlegend=False, uirevision="country")
     
     # Enhanced Agency Chart
-    agency_counts = df["department"].value_counts().head(10)
     agency_fig = px.pie(
         values=agency_counts.values,
-        names=[name[:35] + "..." if len(name) > 35 else name for name in agency_counts.index],
+        names=truncate_text(agency_counts.index.to_series(), 35),
         title="Opportunities by Agency (Top 10)",
         color_discrete_sequence=px.colors.qualitative.Set3
     )
     agency_fig.update_layout(height=500)
     
     # Enhanced Timeline Chart
-    df["posted_date"] = pd.to_datetime(df["posted_date"], errors="coerce")
     if not df["posted_date"].isna().all():
-        df_timeline = df.dropna(subset=['posted_date'])
-        timeline_df = df_timeline.groupby([df_timeline["posted_date"].dt.to_period("M"), "is_active"]).size().reset_index(name="count")
-        timeline_df["posted_date"] = timeline_df["posted_date"].astype(str)
+        timeline_df = df.groupby(["posted_month", "is_active"]).size().reset_index(name="count")
         timeline_df["status"] = timeline_df["is_active"].map({1: "Active", 0: "Historical"})
         
         timeline_fig = px.line(
             timeline_df,
-            x="posted_date",
+            x="posted_month",
             y="count",
             color="status",
             title="Opportunities Posted Over Time (Monthly)",
-            labels={"posted_date": "Month", "count": "Number of Opportunities"}
+            labels={"posted_month": "Month", "count": "Number of Opportunities"},
+            render_mode="webgl",
         )
-        timeline_fig.update_layout(height=400)
+        timeline_fig.update_layout(height=400, uirevision="timeline")
     else:
         timeline_fig = go.Figure().add_annotation(
             text="No timeline data available",
@@ -363,36 +696,17 @@ def update_charts(selected_countries, selected_agencies, selected_types, status_
         )
         timeline_fig.update_layout(height=400)
     
-    # New: Contract Value Chart
-    df_with_values = df[df['award_amount'].notna() & (df['award_amount'] != '') & (df['award_amount'] != 'nan')].copy()
-    if not df_with_values.empty:
-        # Parse award amounts
-        df_with_values['award_value'] = 0
-        for idx, row in df_with_values.iterrows():
-            amount_str = str(row['award_amount']).replace('$', '').replace(',', '')
-            try:
-                df_with_values.at[idx, 'award_value'] = float(amount_str)
-            except (ValueError, TypeError):
-                df_with_values.at[idx, 'award_value'] = 0
-        
-        df_with_values = df_with_values[df_with_values['award_value'] > 0]
-        
-        if not df_with_values.empty:
-            value_by_country = df_with_values.groupby('african_country')['award_value'].sum().sort_values(ascending=False).head(10)
-            value_fig = px.bar(
-                x=value_by_country.index,
-                y=value_by_country.values,
-                title="Total Contract Value by Country (Top 10)",
-                labels={"x": "Country", "y": "Total Value ($)"}
-            )
-            value_fig.update_layout(height=400, xaxis_tickangle=-45)
-        else:
-            value_fig = go.Figure().add_annotation(
-                text="No contract value data available",
-                x=0.5, y=0.5,
-                showarrow=False
-            )
-            value_fig.update_layout(height=400)
+    # New: Contract Value Chart (award amounts are parsed at load)
+    has_value = df["award_value"].to_numpy() > 0
+    if has_value.any():
+        value_by_country = df.loc[has_value].groupby('african_country', observed=True, sort=False)['award_value'].sum().nlargest(10)
+        value_fig = px.bar(
+            x=value_by_country.index,
+            y=value_by_country.values,
+            title="Total Contract Value by Country (Top 10)",
+            labels={"x": "Country", "y": "Total Value ($)"}
+        )
+        value_fig.update_layout(height=400, xaxis_tickangle=-45, uirevision="value")
     else:
         value_fig = go.Figure().add_annotation(
             text="No contract value data available",
@@ -401,164 +715,111 @@ def update_charts(selected_countries, selected_agencies, selected_types, status_
         )
         value_fig.update_layout(height=400)
     
-    return country_fig, agency_fig, timeline_fig, value_fig
+    # Cache plain figure dicts so cache hits skip Figure re-validation
+    return tuple(plain_figure(fig) for fig in (country_fig, agency_fig, timeline_fig, value_fig))
 
 
 @app.callback(
-    Output("tables-content", "children"),
+    [
+        Output("tables-title", "children"),
+        Output("tables-message", "children"),
+        Output("opportunities-table", "data"),
+        Output("opportunities-table", "page_current"),
+    ],
     [
         Input("tables-tabs", "value"),
         Input("country-filter", "value"),
         Input("agency-filter", "value"),
         Input("type-filter", "value"),
+        Input("data-version", "data"),
     ],
 )
-def update_tables(active_tab, selected_countries, selected_agencies, selected_types):
+def update_tables(active_tab, selected_countries, selected_agencies, selected_types, data_version):
     """Update tables based on tab selection and filters."""
-    global active_opportunities_df, historical_opportunities_df
+    section_title, message, table_data = build_table(
+        get_dashboard_cache().version,
+        active_tab,
+        _filter_key(selected_countries),
+        _filter_key(selected_agencies),
+        _filter_key(selected_types),
+    )
+    # Go back to the first page whenever the rows change
+    return section_title, message, table_data, 0
+
+
+@cache.memoize()
+def build_table(version: int, active_tab, selected_countries, selected_agencies, selected_types):
+    """Build the table title, message and rows for one data version and filter selection."""
+    data = get_dashboard_cache()
     
-    # Select appropriate dataframe
+    # Select appropriate rows
     if active_tab == "recent":
-        df = active_opportunities_df.copy()
-        title = "Recent/Active Opportunities"
+        status_key = "active"
+        section_title = "Recent/Active Opportunities"
     else:
-        df = historical_opportunities_df.copy()
-        title = "Historical Opportunities Database"
+        status_key = "historical"
+        section_title = "Historical Opportunities Database"
     
     # Apply filters
-    if selected_countries:
-        df = df[df["african_country"].isin(selected_countries)]
-    if selected_agencies:
-        df = df[df["department"].isin(selected_agencies)]
-    if selected_types:
-        df = df[df["notice_type"].isin(selected_types)]
-    
-    if df.empty:
-        return html.Div([
-            html.H3(title, className="section-title"),
-            html.P("No opportunities match the selected filters.", className="no-data-message")
-        ])
-    
-    # Prepare table data with clickable links
-    table_df = df[
-        ["title", "department", "african_country", "posted_date", "response_date", "award_amount", "sam_url"]
-    ].head(100).copy()  # Increased to show more data
-    
-    # Create enhanced table
-    table_data = []
-    for _, row in table_df.iterrows():
-        # Truncate long titles but keep full title for hover
-        title = str(row["title"])
-        display_title = title[:100] + "..." if len(title) > 100 else title
-        
-        # Format dates
-        posted_date = ""
-        if pd.notna(row["posted_date"]):
-            try:
-                posted_date = pd.to_datetime(row["posted_date"]).strftime("%Y-%m-%d")
-            except:
-                posted_date = str(row["posted_date"])[:10]
-        
-        response_date = ""
-        if pd.notna(row["response_date"]):
-            try:
-                response_date = pd.to_datetime(row["response_date"]).strftime("%Y-%m-%d")
-            except:
-                response_date = str(row["response_date"])[:10]
-        
-        # Format award amount
-        award_amount = str(row["award_amount"]) if pd.notna(row["award_amount"]) and str(row["award_amount"]) != "nan" else "Not Disclosed"
-        
-        # Create SAM.gov link
-        sam_url = str(row["sam_url"]) if pd.notna(row["sam_url"]) else ""
-        
-        table_data.append({
-            "Title": display_title,
-            "Agency": str(row["department"])[:50] + "..." if len(str(row["department"])) > 50 else str(row["department"]),
-            "Country": str(row["african_country"]),
-            "Posted Date": posted_date,
-            "Response Due": response_date,
-            "Award Amount": award_amount,
-            "SAM.gov Link": sam_url
-        })
-    
-    # Create enhanced table with clickable links
-    columns = [
-        {"name": "Title", "id": "Title"},
-        {"name": "Agency", "id": "Agency"},
-        {"name": "Country", "id": "Country"},
-        {"name": "Posted Date", "id": "Posted Date"},
-        {"name": "Response Due", "id": "Response Due"},
-        {"name": "Award Amount", "id": "Award Amount"},
-        {"name": "SAM.gov Link", "id": "SAM.gov Link", "type": "text", "presentation": "markdown"},
-    ]
+    df = data.all_df
+    rows = np.flatnonzero(filter_mask(df, selected_countries, selected_agencies, selected_types, data.status_masks[status_key]))
     
-    # Convert URLs to markdown links
-    for row in table_data:
-        if row["SAM.gov Link"] and row["SAM.gov Link"] != "":
-            row["SAM.gov Link"] = f"[View Opportunity]({row['SAM.gov Link']})"
-        else:
-            row["SAM.gov Link"] = "N/A"
+    if rows.size == 0:
+        return section_title, "No opportunities match the selected filters.", []
     
-    enhanced_table = dash_table.DataTable(
-        data=table_data,
-        columns=columns,
-        style_cell={
-            'textAlign': 'left',
-            'padding': '12px',
-            'fontFamily': 'Arial',
-            'fontSize': '14px',
-        },
-        style_header={
-            'backgroundColor': '#f8f9fa',
-            'fontWeight': 'bold',
-            'border': '1px solid #dee2e6'
-        },
-        style_data={
-            'border': '1px solid #dee2e6'
-        },
-        style_data_conditional=[
-            {
-                'if': {'row_index': 'odd'},
-                'backgroundColor': '#f8f9fa'
-            }
-        ],
-        page_size=25,
-        sort_action="native",
-        filter_action="native",
-        export_action="csv",
-        export_format="csv",
-    )
+    # Only the shown rows of the preformatted display columns are copied
+    table_df = df.iloc[rows[:100], df.columns.get_indexer(list(TABLE_FIELDS))]  # Increased to show more data
+    table_data = table_df.rename(columns=TABLE_FIELDS).to_dict("records")
     
-    return html.Div([
-        html.H3(f"{title} ({len(df):,} total)", className="section-title"),
-        enhanced_table
-    ])
+    return f"{section_title} ({rows.size:,} total)", "", table_data
 
 
 # --------------------------------------------------------------- #
 # ENHANCED BACKGROUND SCHEDULER                                 #
 # --------------------------------------------------------------- #
 
-def run_enhanced_scheduler():
+def _scheduled_historical_sync() -> None:
+    """Run the daily historical sync, leaving a failed run for the next day."""
+    try:
+        run_historical_sync()
+    except Exception as e:
+        # schedule only books the next run after a job returns, so raising would rerun the sweep every 5 minutes
+        logger.error("Scheduled historical sync failed, next run tomorrow: %s", e)
+
+def run_enhanced_scheduler(leader: bool = SCHEDULER_LEADER):
     """Enhanced background scheduler with comprehensive data updates."""
-    schedule.every(UPDATE_INTERVAL_HOURS).hours.do(lambda: load_all_data())
-    schedule.every().day.at("02:00").do(update_comprehensive_africa_data)  # Daily full sync at 2 AM
+    scheduler = schedule.Scheduler()
+    scheduler.every(UPDATE_INTERVAL_HOURS).hours.do(refresh_data)
+    if leader:
+        # Only one process per deployment should write the database
+        scheduler.every().day.at("02:00").do(_scheduled_historical_sync)  # Daily full sync at 2 AM
     
     while True:
         try:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            # Sleep until the next job is due instead of polling
+            idle = scheduler.idle_seconds
+            time.sleep(3600 if idle is None else max(idle, 0))
+            scheduler.run_pending()
         except Exception as e:
-            print(f"[ERROR] Scheduler error: {e}")
+            logger.error("Scheduler error: %s", e)
             time.sleep(300)  # Wait 5 minutes on error
 
-# Start enhanced background scheduler
-threading.Thread(target=run_enhanced_scheduler, daemon=True).start()
+def start_scheduler(leader: bool = SCHEDULER_LEADER) -> threading.Thread:
+    """Start the background scheduler thread for this process."""
+    thread = threading.Thread(target=run_enhanced_scheduler, args=(leader,), daemon=True)
+    thread.start()
+    logger.info("Scheduler started in process %d%s", os.getpid(), " with the daily sync" if leader else "")
+    return thread
+
+# Start enhanced background scheduler; under gunicorn the config hooks start
+# it after forking, since threads do not survive into the worker processes
+if not DEFER_SCHEDULER:
+    start_scheduler()
 
 # --------------------------------------------------------------- #
 # MAIN ENTRY POINT                                              #
 # --------------------------------------------------------------- #
 
+# Production runs under gunicorn (see gunicorn_conf.py); this is the dev server
 if __name__ == "__main__":
     app.run_server(debug=True, host="0.0.0.0", port=8050)
\ No newline at end of file
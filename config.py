@@ -47,8 +47,17 @@ AFRICA_KEYWORDS = [
 # Enhanced Configuration for Historical Data Collection
 DASHBOARD_TITLE = "SAM.gov Africa Opportunities Dashboard - Complete Historical Database"
 UPDATE_INTERVAL_HOURS = int(os.getenv('UPDATE_INTERVAL_HOURS', 6))
+# Set to 0 on all but one server of a multi-server deployment; under gunicorn_conf.py
+# only one worker of the leader server runs the daily sync
+SCHEDULER_LEADER = os.getenv('SAM_SCHEDULER_LEADER', '1') == '1'
+# Set by gunicorn_conf.py, which starts the scheduler from its own hooks
+DEFER_SCHEDULER = os.getenv('SAM_DEFER_SCHEDULER', '0') == '1'
+# Raise to WARNING to silence per-request progress messages
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 
 # Historical data collection settings
 HISTORICAL_YEARS_BACK = int(os.getenv('HISTORICAL_YEARS_BACK', 10))  # Default 10 years back
 MAX_RESULTS_PER_REQUEST = 1000
+MAX_CONCURRENT_REQUESTS = int(os.getenv('SAM_MAX_CONCURRENT_REQUESTS', 4))  # Pages fetched in parallel
 SAM_GOV_OPPORTUNITY_BASE_URL = "https://sam.gov/opp/"
\ No newline at end of file
@@ -0,0 +1,45 @@
+import fcntl
+import os
+
+# app.py must not start its scheduler at import: with preload_app the import
+# happens in the master, and the thread would not exist in the forked workers
+os.environ.setdefault("SAM_DEFER_SCHEDULER", "1")
+
+# Imported only now: config reads SAM_DEFER_SCHEDULER when it loads
+from config import SCHEDULER_LEADER
+
+# Load the app (and the opportunity data) once in the master; workers share
+# those pages copy-on-write instead of each holding their own copy
+preload_app = True
+workers = int(os.getenv("WEB_CONCURRENCY", 4))
+worker_class = "gthread"
+threads = 2
+
+# Held for its lifetime by the one worker that runs the daily database sync;
+# when that worker exits the lock is released and its replacement takes over
+LEADER_LOCK_PATH = "data/scheduler.lock"
+_leader_lock_fd = None
+
+
+def _claim_leadership() -> bool:
+    """Try to become the worker that runs the daily sync."""
+    global _leader_lock_fd
+    fd = os.open(LEADER_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    _leader_lock_fd = fd
+    return True
+
+
+def post_fork(server, worker):
+    """Give each worker its own thread to reload data; one of them also runs the daily sync.
+
+    Nothing runs in the master, so workers are never forked while a sync
+    thread holds the shared client's locks. With SAM_SCHEDULER_LEADER=0 no
+    worker of this server runs the daily sync.
+    """
+    import app
+    app.start_scheduler(leader=SCHEDULER_LEADER and _claim_leadership())
@@ -1,11 +1,23 @@
+import fcntl
 import os
-import json
+import random
+import re
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 import sqlite3
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Any, Callable, Deque, Iterable, List, Dict, Iterator, Optional, Tuple
+import logging
+import tempfile
+import threading
 import time
+import uuid
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from config import (
     SAM_API_KEY,
@@ -14,14 +26,210 @@ from config import (
     AFRICA_KEYWORDS,
     AFRICAN_COUNTRY_NAMES,
     HISTORICAL_YEARS_BACK,
+    LOG_FORMAT,
+    LOG_LEVEL,
+    MAX_CONCURRENT_REQUESTS,
     MAX_RESULTS_PER_REQUEST,
     SAM_GOV_OPPORTUNITY_BASE_URL,
 )
 
+logger = logging.getLogger(__name__)
+
+DB_PATH = "data/sam_africa_opportunities.db"
+# Columnar copy of the opportunities table, rewritten after every save
+SNAPSHOT_PATH = "data/sam_africa_opportunities.parquet"
+# Text columns returned as timestamps by the snapshot and database loads
+SNAPSHOT_DATE_COLUMNS = ("posted_date", "response_date")
+
+# Historical sync state shared by every process of a deployment
+SYNC_LOCK_PATH = "data/sync.lock"
+SYNC_STATE_PATH = "data/sync_state.json"
+# Attempts at the sync lock, so a status poll briefly probing it is not mistaken for a running sync
+_SYNC_LOCK_ATTEMPTS = 5
+_SYNC_LOCK_RETRY_SECONDS = 0.05
+
+# SAM.gov deadlines carry UTC offsets; drop them so dates keep their reported wall-clock value
+_UTC_OFFSET = r"(?:Z|[+-]\d{2}:?\d{2})$"
+
+# Retries of a rate-limited (429) page request, with exponential backoff between them
+_RATE_LIMIT_RETRIES = 6
+_BACKOFF_BASE_SECONDS = 2
+_BACKOFF_CAP_SECONDS = 60
+
+# Set for O(1) place-of-performance membership checks
+_AFRICAN_COUNTRIES = frozenset(AFRICAN_COUNTRIES)
+
+
+def _prefix_tree_pattern(terms: List[str]) -> str:
+    """Build a regex matching any of terms, with shared prefixes factored into a tree."""
+    tree: Dict = {}
+    for term in terms:
+        node = tree
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def build(node: Dict) -> str:
+        # Only presence matters, so a shorter term makes its longer extensions redundant
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    
+    return build(tree)
+
+# Africa keywords and country names as one prefix tree, so each text position
+# is tried against every term in a single pass (e.g. "a(?:frica|lgeria|ngola)")
+_AFRICA_TERMS = re.compile(_prefix_tree_pattern(
+    [term.lower() for term in [*AFRICA_KEYWORDS, *AFRICAN_COUNTRY_NAMES.values()]]
+))
+
+# Database columns copied straight from top-level SAM.gov record fields
+_FIELD_MAP = (
+    ("notice_id", "noticeId"),
+    ("title", "title"),
+    ("description", "description"),
+    ("department", "department"),
+    ("sub_tier", "subTier"),
+    ("office", "office"),
+    ("posted_date", "postedDate"),
+    ("response_date", "responseDeadLine"),
+    ("notice_type", "type"),
+    ("base_type", "baseType"),
+    ("archive_date", "archiveDate"),
+    ("archive_type", "archiveType"),
+    ("award_date", "awardDate"),
+    ("award_number", "awardNumber"),
+    ("award_amount", "awardAmount"),
+    ("awardee", "awardee"),
+)
+_NON_TEXT_FIELDS = ("award_number", "award_amount", "awardee")
+
+# Columns of the opportunities table, in CREATE TABLE order
+_DB_COLUMNS = (
+    "notice_id", "title", "description", "department", "sub_tier", "office",
+    "posted_date", "response_date", "notice_type", "base_type", "archive_date",
+    "archive_type", "award_date", "award_number", "award_amount", "awardee",
+    "pop_country_code", "pop_country_name", "pop_state", "pop_city",
+    "african_country", "sam_url", "is_active", "data_collection_date", "last_updated",
+)
+# Schema of the opportunities table; tables written by the old to_sql path are migrated to it
+_CREATE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS opportunities (
+        notice_id TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        department TEXT,
+        sub_tier TEXT,
+        office TEXT,
+        posted_date TEXT,
+        response_date TEXT,
+        notice_type TEXT,
+        base_type TEXT,
+        archive_date TEXT,
+        archive_type TEXT,
+        award_date TEXT,
+        award_number TEXT,
+        award_amount TEXT,
+        awardee TEXT,
+        pop_country_code TEXT,
+        pop_country_name TEXT,
+        pop_state TEXT,
+        pop_city TEXT,
+        african_country TEXT,
+        sam_url TEXT,
+        is_active INTEGER,
+        data_collection_date TEXT,
+        last_updated TEXT
+    )
+'''
+# Re-saving a notice updates it in place but keeps when it was first collected
+_UPSERT_SQL = (
+    f"INSERT INTO opportunities ({', '.join(_DB_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(_DB_COLUMNS))}) "
+    "ON CONFLICT(notice_id) DO UPDATE SET "
+    + ", ".join(
+        f"{column} = excluded.{column}"
+        for column in _DB_COLUMNS
+        if column not in ("notice_id", "data_collection_date")
+    )
+)
+# Applied to every connection: WAL lets dashboard reads run alongside a sync's
+# writes, and NORMAL sync only fsyncs at checkpoints, which is safe under WAL
+_CONNECTION_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA mmap_size=268435456;
+"""
+# Rows upserted per transaction by save_to_database
+_SAVE_BATCH_ROWS = 50_000
+# notice_id prefix of the demonstration records from create_enhanced_sample_data
+SAMPLE_ID_PREFIX = "SAMPLE"
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """Parse ISO 8601 date strings, coercing blanks and junk to NaT."""
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        return series.astype("datetime64[ns]")  # already typed, e.g. read from the snapshot
+    values = series.astype(str).str.replace(_UTC_OFFSET, "", regex=True)
+    return pd.to_datetime(values, errors="coerce", format="ISO8601")
+
+
+def _parse_date_columns(df: pd.DataFrame) -> None:
+    """Parse the stored date text of a loaded opportunities frame in place."""
+    for col in SNAPSHOT_DATE_COLUMNS:
+        if col in df:
+            df[col] = parse_dates(df[col])
+
+
+def _rate_limit_delay(retry_after: Optional[str], attempt: int) -> Optional[float]:
+    """Seconds to wait after a 429: the server's Retry-After if given, else full-jitter backoff.
+    
+    Randomizing the wait keeps concurrent page requests that were throttled
+    together from all retrying at the same moment. Returns None when the
+    server asks for a longer wait than the backoff cap (e.g. an exhausted
+    daily quota), so the page is given up instead of parking its thread.
+    """
+    if retry_after and retry_after.strip().isdigit():
+        if int(retry_after) > _BACKOFF_CAP_SECONDS:
+            return None
+        return int(retry_after) + random.uniform(0, 1)
+    return random.uniform(0, min(_BACKOFF_CAP_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _bounded_map(pool: ThreadPoolExecutor, fn: Callable[[Any], Any], items: Iterable, window: int) -> Iterator:
+    """Like pool.map, but with at most `window` calls submitted and not yet yielded.
+    
+    pool.map queues every call up front, so results that finish ahead of a
+    slow one pile up in memory; here the next call is only submitted as each
+    result is handed over.
+    """
+    items = iter(items)
+    pending: Deque[Future] = deque()
+    try:
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                break
+        while pending:
+            result = pending.popleft().result()
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                break
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
 
 class EnhancedSAMAfricaAPI:
     """Enhanced production-ready class for comprehensive SAM.gov data collection."""
     
+    # Set once the data directory and schema have been set up in this process
+    _db_ready = False
+    
     def __init__(self) -> None:
         self.api_key = SAM_API_KEY
         self.base_url = SAM_BASE_URL
@@ -32,139 +240,207 @@ class EnhancedSAMAfricaAPI:
             "Accept": "application/json",
             "User-Agent": "SAM-Africa-Dashboard-Enhanced/2.0"
         })
-        # Ensure data directory and database exist
-        self._ensure_data_directory()
-        self._init_database()
+        # Retry transient server and connection errors with backoff; 429s are handled
+        # in _fetch_page. One pooled connection per request slot keeps them all alive.
+        retries = Retry(total=5, backoff_factor=1.5, status_forcelist=[500, 502, 503, 504], raise_on_status=False)
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS, max_retries=retries
+        ))
+        # Shared by every page request, however many chunks are being collected
+        self._request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+        # Set by the first page response: False once SAM.gov rejects the key with a 401
+        self._key_validated: Optional[bool] = None
+        # Ensure data directory and database exist, once per process
+        if not EnhancedSAMAfricaAPI._db_ready:
+            self._ensure_data_directory()
+            self._init_database()
+            EnhancedSAMAfricaAPI._db_ready = True
     
     def _ensure_data_directory(self) -> None:
         """Create data directory if it doesn't exist."""
         data_dir = "data"
         if not os.path.exists(data_dir):
             os.makedirs(data_dir, exist_ok=True)
-            print(f"[INFO] Created {data_dir} directory")
+            logger.info("Created %s directory", data_dir)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database with the connection PRAGMAs applied."""
+        conn = sqlite3.connect(DB_PATH)
+        conn.executescript(_CONNECTION_PRAGMAS)
+        return conn
     
     def _init_database(self) -> None:
         """Initialize SQLite database for comprehensive data storage."""
-        db_path = "data/sam_africa_opportunities.db"
-        conn = sqlite3.connect(db_path)
+        conn = self._connect()
+        conn.isolation_level = None  # statements autocommit; the migration opens its own transaction
         cursor = conn.cursor()
         
+        if self._is_legacy_table(cursor):
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                self._migrate_legacy_table(cursor)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        
         # Create main opportunities table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS opportunities (
-                notice_id TEXT PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                department TEXT,
-                sub_tier TEXT,
-                office TEXT,
-                posted_date TEXT,
-                response_date TEXT,
-                notice_type TEXT,
-                base_type TEXT,
-                archive_date TEXT,
-                archive_type TEXT,
-                award_date TEXT,
-                award_number TEXT,
-                award_amount TEXT,
-                awardee TEXT,
-                pop_country_code TEXT,
-                pop_country_name TEXT,
-                pop_state TEXT,
-                pop_city TEXT,
-                african_country TEXT,
-                sam_url TEXT,
-                is_active INTEGER,
-                data_collection_date TEXT,
-                last_updated TEXT
-            )
-        ''')
+        cursor.execute(_CREATE_TABLE_SQL)
         
         # Create index for faster queries
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_country ON opportunities(african_country)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_posted_date ON opportunities(posted_date)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_active ON opportunities(is_active)')
+        # Serves the active/historical loads' WHERE and ORDER BY in one range scan;
+        # it also covers plain is_active lookups, so the old single-column index goes
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_active_posted ON opportunities(is_active, posted_date DESC)')
+        cursor.execute('DROP INDEX IF EXISTS idx_active')
         
-        conn.commit()
         conn.close()
-        print("[INFO] Database initialized successfully")
+        logger.info("Database initialized successfully")
+    
+    @staticmethod
+    def _is_legacy_table(cursor: sqlite3.Cursor) -> bool:
+        """Report whether opportunities was written by the old to_sql path and lacks its primary key."""
+        notice_id_pk = cursor.execute(
+            "SELECT pk FROM pragma_table_info('opportunities') WHERE name = 'notice_id'"
+        ).fetchone()
+        return notice_id_pk is not None and notice_id_pk[0] == 0
+    
+    def _migrate_legacy_table(self, cursor: sqlite3.Cursor) -> None:
+        """Move the rows of a table written by the old DataFrame.to_sql path into a keyed table.
+        
+        Runs inside the caller's transaction, and rechecks the table there in
+        case another process migrated it first.
+        """
+        if not self._is_legacy_table(cursor):
+            return
+        cursor.execute("ALTER TABLE opportunities RENAME TO opportunities_legacy")
+        cursor.execute(_CREATE_TABLE_SQL)
+        columns = ", ".join(_DB_COLUMNS)
+        cursor.execute(f"INSERT OR REPLACE INTO opportunities ({columns}) SELECT {columns} FROM opportunities_legacy")
+        cursor.execute("DROP TABLE opportunities_legacy")
+        logger.info("Migrated opportunities table to a notice_id primary key")
     
     def _validate_api_key(self) -> bool:
-        """Validate API key by making a test request."""
+        """Check that an API key is configured and has not been rejected.
+        
+        The key itself is checked against the first real page request; a 401
+        there marks it invalid, so no separate probe request is needed.
+        """
         if not self.api_key:
-            print("[ERROR] SAM_API_KEY environment variable not set")
+            logger.error("SAM_API_KEY environment variable not set")
             return False
         
-        test_params = {
-            "api_key": self.api_key,
-            "limit": 1,
-            "postedFrom": datetime.now().strftime("%m/%d/%Y"),
-            "postedTo": datetime.now().strftime("%m/%d/%Y")
-        }
-        
-        try:
-            response = self.session.get(self.base_url, params=test_params, timeout=10)
-            if response.status_code == 401:
-                print(f"[ERROR] Invalid API key: {self.api_key[:20]}...")
-                print("[INFO] Please verify your SAM.gov API key at https://sam.gov")
-                return False
-            elif response.status_code == 200:
-                print("[INFO] API key validated successfully")
-                return True
-            else:
-                print(f"[WARN] API validation returned status {response.status_code}")
-                return True  # Continue anyway
-        except Exception as e:
-            print(f"[WARN] Could not validate API key: {e}")
-            return True  # Continue anyway
+        return self._key_validated is not False
     
     def fetch_comprehensive_historical_data(self) -> List[Dict]:
-        """Fetch ALL historical data for African countries - comprehensive collection."""
+        """Fetch ALL historical data for African countries - comprehensive collection.
+        
+        Returns processed Africa-related records; pages are filtered as they are fetched.
+        """
+        return [opp for chunk in self.iter_comprehensive_historical_data() for opp in chunk]
+    
+    def iter_comprehensive_historical_data(self) -> Iterator[List[Dict]]:
+        """Yield the processed Africa-related records of each 30-day chunk, oldest first."""
         if not self._validate_api_key():
-            print("[ERROR] API key validation failed")
-            return []
+            logger.error("API key validation failed")
+            return
         
-        print(f"[INFO] Starting comprehensive historical data collection for {HISTORICAL_YEARS_BACK} years")
-        all_opportunities = []
+        logger.info("Starting comprehensive historical data collection for %d years", HISTORICAL_YEARS_BACK)
+        total_africa = 0
+        total_fetched = 0
         
         # Generate date ranges for comprehensive collection
         end_date = datetime.now()
         start_date = end_date - timedelta(days=HISTORICAL_YEARS_BACK * 365)
         
         # Collect data in 30-day chunks to avoid API limits
+        chunks = []
         current_date = start_date
-        chunk_count = 0
-        
         while current_date < end_date:
             chunk_end = min(current_date + timedelta(days=30), end_date)
-            chunk_count += 1
-            
-            print(f"[INFO] Collecting chunk {chunk_count}: {current_date.strftime('%Y-%m-%d')} to {chunk_end.strftime('%Y-%m-%d')}")
-            
-            chunk_opportunities = self.fetch_opportunities(
-                posted_from=current_date.strftime("%m/%d/%Y"),
-                posted_to=chunk_end.strftime("%m/%d/%Y"),
-                limit=MAX_RESULTS_PER_REQUEST
-            )
+            chunks.append((current_date, chunk_end))
+            current_date = chunk_end
+        
+        # Chunks are collected concurrently; _fetch_page caps the requests in flight
+        # across all of them, so this only keeps the request slots busy
+        logger.info("Collecting %d chunks, up to %d at a time", len(chunks), MAX_CONCURRENT_REQUESTS)
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+            collected = _bounded_map(pool, lambda chunk: self._collect_chunk(*chunk), chunks, MAX_CONCURRENT_REQUESTS)
+            for fetched, chunk_africa in collected:
+                total_fetched += fetched
+                total_africa += len(chunk_africa)
+                yield chunk_africa
+        
+        if self._key_validated is False:
+            logger.error("API key rejected, collection stopped early")
+        
+        logger.info("Historical data collection complete: %d Africa-related out of %d total opportunities",
+                    total_africa, total_fetched)
+    
+    def _collect_chunk(self, posted_from: datetime, posted_to: datetime) -> Tuple[int, List[Dict]]:
+        """Fetch one date range, returning its record count and Africa-related records."""
+        if self._key_validated is False:
+            return 0, []
+        
+        logger.info("Collecting chunk %s to %s", posted_from.date(), posted_to.date())
+        
+        # Filter each page as it arrives so raw records never pile up in memory
+        fetched = 0
+        africa_opportunities: List[Dict] = []
+        for page in self.iter_opportunity_pages(
+            posted_from=posted_from.strftime("%m/%d/%Y"),
+            posted_to=posted_to.strftime("%m/%d/%Y"),
+            limit=MAX_RESULTS_PER_REQUEST
+        ):
+            fetched += len(page)
+            africa_opportunities.extend(self.filter_africa_opportunities(page))
+        
+        if africa_opportunities:
+            logger.info("Collected %d Africa-related opportunities from %s to %s",
+                        len(africa_opportunities), posted_from.date(), posted_to.date())
+        return fetched, africa_opportunities
+    
+    def _fetch_page(self, params: Dict, offset: int) -> Optional[Dict]:
+        """Fetch one page of search results, waiting out rate limiting."""
+        page_params = {**params, "offset": offset}
+        
+        for attempt in range(_RATE_LIMIT_RETRIES):
+            logger.info("API request, offset: %d", offset)
+            with self._request_slots:
+                response = self.session.get(self.base_url, params=page_params, timeout=60)
             
-            if chunk_opportunities:
-                all_opportunities.extend(chunk_opportunities)
-                print(f"[INFO] Collected {len(chunk_opportunities)} opportunities from this chunk")
+            if response.status_code == 401:
+                logger.error("Invalid API key: %s...", self.api_key[:20])
+                logger.info("Please verify your SAM.gov API key at https://sam.gov")
+                self._key_validated = False
+                return None
+            elif response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                delay = _rate_limit_delay(retry_after, attempt)
+                if delay is None:
+                    logger.error("Rate limited for %s seconds, skipping offset %d", retry_after.strip(), offset)
+                    return None
+                logger.warning("Rate limited. Waiting %.1f seconds...", delay)
+                time.sleep(delay)
+                continue
+            elif response.status_code != 200:
+                logger.error("API returned status %d: %s", response.status_code, response.text[:200])
+                return None
             
-            # Rate limiting to be respectful to SAM.gov API
-            time.sleep(2)  # 2-second delay between requests
-            current_date = chunk_end
+            self._key_validated = True
+            return orjson.loads(response.content)  # parses the raw bytes; no charset sniffing
         
-        print(f"[INFO] Historical data collection complete: {len(all_opportunities)} total opportunities")
-        return all_opportunities
+        logger.error("Still rate limited after retries, skipping offset %d", offset)
+        return None
     
-    def fetch_opportunities(
+    def iter_opportunity_pages(
         self,
         posted_from: Optional[str] = None,
         posted_to: Optional[str] = None,
         limit: int = MAX_RESULTS_PER_REQUEST,
-    ) -> List[Dict]:
-        """Enhanced opportunity fetching with better pagination and error handling."""
+    ) -> Iterator[List[Dict]]:
+        """Yield the opportunities of each result page in offset order, fetching pages concurrently."""
         if not posted_from:
             posted_from = (datetime.now() - timedelta(days=30)).strftime("%m/%d/%Y")
         if not posted_to:
@@ -175,119 +451,93 @@ class EnhancedSAMAfricaAPI:
             "postedFrom": posted_from,
             "postedTo": posted_to,
             "limit": limit,
-            "offset": 0,
             "includeExpired": "true",  # Include expired/archived opportunities
         }
         
-        all_opportunities: List[Dict] = []
         max_requests = 50  # Increased for comprehensive collection
         
         try:
-            for request_count in range(max_requests):
-                print(f"[INFO] API request {request_count + 1}/{max_requests}, offset: {params['offset']}")
-                response = self.session.get(self.base_url, params=params, timeout=60)
-                
-                if response.status_code == 401:
-                    print(f"[ERROR] Unauthorized access. Check API key: {self.api_key[:20]}...")
-                    break
-                elif response.status_code == 429:
-                    print("[WARN] Rate limited. Waiting 30 seconds...")
-                    time.sleep(30)
-                    continue
-                elif response.status_code != 200:
-                    print(f"[ERROR] API returned status {response.status_code}: {response.text[:200]}")
-                    break
-                
-                data = response.json()
-                opportunities = data.get("opportunitiesData", [])
-                
-                if not opportunities:
-                    print("[INFO] No more opportunities found")
-                    break
-                
-                all_opportunities.extend(opportunities)
-                print(f"[INFO] Retrieved {len(opportunities)} opportunities (total: {len(all_opportunities)})")
-                
-                # Stop if fewer than limit results (last page)
-                if len(opportunities) < limit:
-                    break
-                
-                params["offset"] += limit
-                
-                # Rate limiting
-                time.sleep(1)  # 1-second delay between requests
+            # The first page tells us how many records the date range holds
+            data = self._fetch_page(params, 0)
+            if not data:
+                return
+            
+            opportunities = data.get("opportunitiesData", [])
+            if not opportunities:
+                logger.info("No more opportunities found")
+                return
+            
+            total_records = data.get("totalRecords", len(opportunities))
+            logger.info("Retrieved %d of %d opportunities", len(opportunities), total_records)
+            yield opportunities
+            
+            # Fetch the remaining pages concurrently; the pool size caps the load on SAM.gov
+            offsets = range(limit, min(total_records, limit * max_requests), limit)
+            with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as pool:
+                pages = _bounded_map(pool, lambda offset: self._fetch_page(params, offset), offsets, MAX_CONCURRENT_REQUESTS)
+                for page in pages:
+                    if page:
+                        yield page.get("opportunitiesData", [])
                 
         except requests.exceptions.Timeout:
-            print("[ERROR] Request timeout - using partial results")
+            logger.error("Request timeout - using partial results")
         except requests.exceptions.RequestException as exc:
-            print(f"[ERROR] API request failed: {exc}")
+            logger.error("API request failed: %s", exc)
         except Exception as exc:
-            print(f"[ERROR] Unexpected error: {exc}")
-        
-        return all_opportunities
+            logger.error("Unexpected error: %s", exc)
+    
+    def fetch_opportunities(
+        self,
+        posted_from: Optional[str] = None,
+        posted_to: Optional[str] = None,
+        limit: int = MAX_RESULTS_PER_REQUEST,
+    ) -> List[Dict]:
+        """Enhanced opportunity fetching with concurrent pagination and error handling."""
+        return [opp for page in self.iter_opportunity_pages(posted_from, posted_to, limit) for opp in page]
     
     def filter_africa_opportunities(self, opportunities: List[Dict]) -> List[Dict]:
         """Enhanced filtering for African opportunities with better accuracy."""
         africa_opps: List[Dict] = []
+        now_iso = datetime.now().isoformat()  # one collection timestamp for the whole batch
         
         for opp in opportunities:
-            is_africa = False
-            
-            # Check place of performance
-            pop = opp.get("placeOfPerformance", {})
-            country_code = pop.get("country", {}).get("code", "")
+            # Check place of performance first; a match needs no text scanning at all.
+            # The looked-up dict is handed on so matches are not traversed twice.
+            pop = opp.get("placeOfPerformance") or {}
+            country_code = (pop.get("country") or {}).get("code")
             
-            if country_code in AFRICAN_COUNTRIES:
-                is_africa = True
+            if country_code in _AFRICAN_COUNTRIES:
+                africa_opps.append(self.process_opportunity(opp, now_iso, pop))
+                continue
             
-            # Enhanced keyword checking
-            title = str(opp.get("title", "")).lower()
-            desc = str(opp.get("description", "")).lower()
-            
-            # Check for Africa keywords
-            if any(keyword in title or keyword in desc for keyword in AFRICA_KEYWORDS):
-                is_africa = True
-            
-            # Check for specific country names
-            for country_name in AFRICAN_COUNTRY_NAMES.values():
-                if country_name.lower() in title or country_name.lower() in desc:
-                    is_africa = True
-                    break
-            
-            if is_africa:
-                africa_opps.append(self.process_opportunity(opp))
+            # Check for Africa keywords and specific country names; the
+            # (longer) description is only lowercased when the title misses
+            if (
+                _AFRICA_TERMS.search((opp.get("title") or "").lower())
+                or _AFRICA_TERMS.search((opp.get("description") or "").lower())
+            ):
+                africa_opps.append(self.process_opportunity(opp, now_iso, pop))
         
         return africa_opps
     
-    def process_opportunity(self, opp: Dict) -> Dict:
+    def process_opportunity(self, opp: Dict, now_iso: Optional[str] = None, pop: Optional[Dict] = None) -> Dict:
         """Enhanced opportunity processing with SAM.gov links and status tracking."""
-        notice_id = str(opp.get("noticeId", ""))
-        
-        processed: Dict = {
-            "notice_id": notice_id,
-            "title": str(opp.get("title", "")),
-            "description": str(opp.get("description", ""))[:2000],  # Increased description length
-            "department": str(opp.get("department", "")),
-            "sub_tier": str(opp.get("subTier", "")),
-            "office": str(opp.get("office", "")),
-            "posted_date": str(opp.get("postedDate", "")),
-            "response_date": str(opp.get("responseDeadLine", "")),
-            "notice_type": str(opp.get("type", "")),
-            "base_type": str(opp.get("baseType", "")),
-            "archive_date": str(opp.get("archiveDate", "")),
-            "archive_type": str(opp.get("archiveType", "")),
-            "award_date": str(opp.get("awardDate", "")),
-            "award_number": str(opp.get("awardNumber", "")),
-            "award_amount": str(opp.get("awardAmount", "")),
-            "awardee": str(opp.get("awardee", "")),
-        }
+        # SAM.gov returns text fields as JSON strings (or null), so only the
+        # award fields, which may arrive as numbers, need coercing
+        processed: Dict = {column: opp.get(key) or "" for column, key in _FIELD_MAP}
+        for column in _NON_TEXT_FIELDS:
+            processed[column] = str(processed[column])
+        processed["description"] = processed["description"][:2000]  # Increased description length
+        notice_id = processed["notice_id"]
         
         # Extract place of performance
-        pop = opp.get("placeOfPerformance", {})
-        processed["pop_country_code"] = str(pop.get("country", {}).get("code", ""))
-        processed["pop_country_name"] = str(pop.get("country", {}).get("name", ""))
-        processed["pop_state"] = str(pop.get("state", {}).get("name", ""))
-        processed["pop_city"] = str(pop.get("city", {}).get("name", ""))
+        if pop is None:
+            pop = opp.get("placeOfPerformance") or {}
+        country = pop.get("country") or {}
+        processed["pop_country_code"] = country.get("code") or ""
+        processed["pop_country_name"] = country.get("name") or ""
+        processed["pop_state"] = (pop.get("state") or {}).get("name") or ""
+        processed["pop_city"] = (pop.get("city") or {}).get("name") or ""
         
         # Map to readable country name
         processed["african_country"] = AFRICAN_COUNTRY_NAMES.get(
@@ -298,116 +548,294 @@ class EnhancedSAMAfricaAPI:
         processed["sam_url"] = f"{self.sam_opportunity_url}{notice_id}/view" if notice_id else ""
         
         # Determine if opportunity is active
-        archive_type = processed["archive_type"]
+        # Judged on the raw value: a null archiveType ("None" before the str()
+        # coercion went away) has always meant inactive
+        archive_type = str(opp.get("archiveType", ""))
         processed["is_active"] = 1 if not archive_type or archive_type == "" or archive_type == "nan" else 0
         
         # Add metadata
-        processed["data_collection_date"] = datetime.now().isoformat()
-        processed["last_updated"] = datetime.now().isoformat()
+        if now_iso is None:
+            now_iso = datetime.now().isoformat()
+        processed["data_collection_date"] = now_iso
+        processed["last_updated"] = now_iso
         
         return processed
     
-    def save_to_database(self, opportunities: List[Dict]) -> pd.DataFrame:
-        """Save opportunities to SQLite database with duplicate handling."""
+    def save_to_database(
+        self, opportunities: List[Dict], replace_samples: bool = True, export_snapshot: bool = True
+    ) -> int:
+        """Upsert opportunities into SQLite by notice_id and return the number saved.
+        
+        Existing notices are updated in place, keeping their original
+        data_collection_date. Rows are written in batched transactions; with
+        replace_samples, demonstration records are removed in the first one so
+        real data supersedes them. Batch writers can skip the Parquet export and
+        call export_snapshot once when they are done.
+        """
         if not opportunities:
-            return pd.DataFrame()
+            return 0
         
-        db_path = "data/sam_africa_opportunities.db"
-        conn = sqlite3.connect(db_path)
+        conn = self._connect()
+        
+        conn.isolation_level = None  # transactions are opened explicitly below
         
         try:
-            # Convert to DataFrame for easier handling
-            df = pd.DataFrame(opportunities)
+            # Take the write lock up front and commit once per batch, which bounds
+            # WAL growth on large backfills without a commit per statement
+            for start in range(0, len(opportunities), _SAVE_BATCH_ROWS):
+                batch = opportunities[start:start + _SAVE_BATCH_ROWS]
+                conn.execute("BEGIN IMMEDIATE")
+                if replace_samples and start == 0:
+                    conn.execute("DELETE FROM opportunities WHERE notice_id LIKE ?", (SAMPLE_ID_PREFIX + "%",))
+                conn.executemany(_UPSERT_SQL, (tuple(map(opp.get, _DB_COLUMNS)) for opp in batch))
+                conn.execute("COMMIT")
             
-            # Save to database with conflict resolution (replace on duplicate notice_id)
-            df.to_sql('opportunities', conn, if_exists='replace', index=False)
+            logger.info("Saved %d opportunities to database", len(opportunities))
             
-            print(f"[INFO] Saved {len(df)} opportunities to database")
-            
-            conn.commit()
-            return df
+            if export_snapshot:
+                self._export_snapshot(conn)
+            return len(opportunities)
             
         except Exception as e:
-            print(f"[ERROR] Failed to save to database: {e}")
-            return pd.DataFrame()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            logger.error("Failed to save to database: %s", e)
+            return 0
         finally:
             conn.close()
     
+    def export_snapshot(self) -> None:
+        """Rewrite the Parquet snapshot from the current database contents."""
+        conn = self._connect()
+        try:
+            self._export_snapshot(conn)
+        finally:
+            conn.close()
+    
+    def _export_snapshot(self, conn: sqlite3.Connection) -> None:
+        """Write the opportunities table to a Parquet snapshot for fast loading."""
+        try:
+            # Fold the WAL into the main file first so the checkpoint that runs when
+            # the connection closes cannot leave the database newer than the snapshot
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            df = pd.read_sql_query("SELECT * FROM opportunities ORDER BY posted_date DESC", conn)
+            # Store typed columns so readers skip re-parsing text
+            _parse_date_columns(df)
+            df["is_active"] = df["is_active"].fillna(0).astype("int8")
+            # A temp file of its own, so concurrent exports from other processes
+            # cannot interleave their writes before the rename
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SNAPSHOT_PATH), suffix=".parquet")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    df.to_parquet(f, engine="pyarrow", compression="zstd", index=False)
+                os.replace(tmp_path, SNAPSHOT_PATH)  # readers never see a partial file
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            logger.info("Wrote %d opportunities to %s", len(df), SNAPSHOT_PATH)
+        except Exception as e:
+            logger.warning("Failed to write Parquet snapshot: %s", e)
+    
+    def _snapshot_is_fresh(self) -> bool:
+        """Check whether the Parquet snapshot is at least as new as the database."""
+        if not os.path.exists(SNAPSHOT_PATH):
+            return False
+        # Any connection creates an empty WAL file, so only a WAL holding
+        # commits not yet checkpointed counts as a change
+        wal_path = DB_PATH + "-wal"
+        paths = [DB_PATH]
+        if os.path.exists(wal_path) and os.path.getsize(wal_path) > 0:
+            paths.append(wal_path)
+        return os.path.getmtime(SNAPSHOT_PATH) >= max(os.path.getmtime(path) for path in paths)
+    
     def load_from_database(self, active_only: bool = False) -> pd.DataFrame:
         """Load opportunities from database with filtering options."""
-        db_path = "data/sam_africa_opportunities.db"
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
-            print("[INFO] Database not found")
+            logger.info("Database not found")
             return pd.DataFrame()
         
+        if self._snapshot_is_fresh():
+            try:
+                # Arrow-backed columns skip the per-value conversion to Python objects;
+                # the active filter is pushed into the Parquet scan itself
+                df = pd.read_parquet(
+                    SNAPSHOT_PATH,
+                    engine="pyarrow",
+                    dtype_backend="pyarrow",
+                    filters=[("is_active", "=", 1)] if active_only else None,
+                )
+                logger.info("Loaded %d opportunities from snapshot", len(df))
+                return df
+            except Exception as e:
+                logger.warning("Failed to read Parquet snapshot, falling back to database: %s", e)
+        
         try:
-            conn = sqlite3.connect(db_path)
+            conn = self._connect()
             
             if active_only:
                 query = "SELECT * FROM opportunities WHERE is_active = 1 ORDER BY posted_date DESC"
             else:
                 query = "SELECT * FROM opportunities ORDER BY posted_date DESC"
             
-            df = pd.read_sql_query(query, conn)
+            df = pd.read_sql_query(query, conn, dtype_backend="pyarrow")
             conn.close()
+            _parse_date_columns(df)  # match the snapshot's typed dates
             
-            print(f"[INFO] Loaded {len(df)} opportunities from database")
+            logger.info("Loaded %d opportunities from database", len(df))
             return df
             
         except Exception as e:
-            print(f"[ERROR] Failed to load from database: {e}")
+            logger.error("Failed to load from database: %s", e)
             return pd.DataFrame()
     
     def get_historical_opportunities(self) -> pd.DataFrame:
         """Get all historical (inactive/archived) opportunities."""
-        db_path = "data/sam_africa_opportunities.db"
+        db_path = DB_PATH
         
         if not os.path.exists(db_path):
             return pd.DataFrame()
         
         try:
-            conn = sqlite3.connect(db_path)
+            conn = self._connect()
             query = "SELECT * FROM opportunities WHERE is_active = 0 ORDER BY posted_date DESC"
             df = pd.read_sql_query(query, conn)
             conn.close()
+            _parse_date_columns(df)
             
-            print(f"[INFO] Loaded {len(df)} historical opportunities from database")
+            logger.info("Loaded %d historical opportunities from database", len(df))
             return df
             
         except Exception as e:
-            print(f"[ERROR] Failed to load historical data: {e}")
+            logger.error("Failed to load historical data: %s", e)
             return pd.DataFrame()
+    
+    def has_opportunities(self) -> bool:
+        """Check whether the database holds any opportunities, real or sample."""
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT 1 FROM opportunities LIMIT 1").fetchone() is not None
+        finally:
+            conn.close()
+
 
+@lru_cache(maxsize=1)
+def get_api() -> EnhancedSAMAfricaAPI:
+    """Return the shared API client, created on first use so its session and pool are reused."""
+    return EnhancedSAMAfricaAPI()
 
-def update_comprehensive_africa_data() -> pd.DataFrame:
-    """Perform comprehensive data update including all historical data."""
-    api = EnhancedSAMAfricaAPI()
-    print("[INFO] Starting comprehensive Africa data update...")
+
+# Lock file descriptors of the syncs this process is running, by sync id
+_held_sync_locks: Dict[str, int] = {}
+
+
+def _write_sync_state(state: Dict) -> None:
+    """Atomically replace the shared sync state file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(SYNC_STATE_PATH), suffix=".json")
+    with os.fdopen(fd, "wb") as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp_path, SYNC_STATE_PATH)
+
+
+def read_sync_state() -> Dict:
+    """Return the id, status and saved count of the latest historical sync, or {} if none has run."""
+    try:
+        with open(SYNC_STATE_PATH, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        return {}
+
+
+def begin_sync() -> Optional[str]:
+    """Claim the deployment-wide sync lock and return a new sync id, or None if a sync is running."""
+    os.makedirs(os.path.dirname(SYNC_LOCK_PATH), exist_ok=True)
+    fd = os.open(SYNC_LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o644)
+    # sync_in_progress holds a shared lock for a moment, so retry before giving up
+    for attempt in range(_SYNC_LOCK_ATTEMPTS):
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError:
+            if attempt == _SYNC_LOCK_ATTEMPTS - 1:
+                os.close(fd)
+                return None
+            time.sleep(_SYNC_LOCK_RETRY_SECONDS)
     
-    # Fetch comprehensive historical data
-    all_opps = api.fetch_comprehensive_historical_data()
+    sync_id = uuid.uuid4().hex
+    _held_sync_locks[sync_id] = fd
+    _write_sync_state({"id": sync_id, "status": "running"})
+    return sync_id
+
+
+def end_sync(sync_id: str, status: str, saved: int = 0) -> None:
+    """Record how a sync claimed with begin_sync ended ("done" or "failed") and release its lock."""
+    fd = _held_sync_locks.pop(sync_id)
+    try:
+        _write_sync_state({"id": sync_id, "status": status, "saved": saved})
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def sync_in_progress() -> bool:
+    """Check whether any process of the deployment is running a historical sync."""
+    if read_sync_state().get("status") != "running":
+        return False
     
-    if not all_opps:
-        print("[WARN] No opportunities retrieved from API")
-        return create_enhanced_sample_data()
+    # A process that died mid-sync leaves "running" behind, but its lock is gone
+    try:
+        fd = os.open(SYNC_LOCK_PATH, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+
+
+def update_comprehensive_africa_data() -> int:
+    """Perform comprehensive data update including all historical data.
     
-    print(f"[INFO] Processing {len(all_opps):,} total opportunities")
-    africa_opps = api.filter_africa_opportunities(all_opps)
+    Each chunk's Africa-related records are saved as soon as the chunk is
+    collected, so the full result set is never held in memory. Returns the
+    number of opportunities saved.
+    """
+    api = get_api()
+    logger.info("Starting comprehensive Africa data update...")
     
-    if not africa_opps:
-        print("[WARN] No Africa-related opportunities found")
-        return create_enhanced_sample_data()
+    found = 0
+    saved = 0
+    try:
+        for chunk_africa in api.iter_comprehensive_historical_data():
+            if not chunk_africa:
+                continue
+            found += len(chunk_africa)
+            # The first successful save replaces any sample rows; the snapshot is exported once below
+            saved += api.save_to_database(chunk_africa, replace_samples=not saved, export_snapshot=False)
+    finally:
+        # Workers only see new rows through the snapshot, so export even if the sweep fails midway
+        if saved:
+            api.export_snapshot()
     
-    print(f"[INFO] Found {len(africa_opps):,} Africa-related opportunities")
-    df = api.save_to_database(africa_opps)
+    if not found:
+        logger.warning("No Africa-related opportunities found")
+        # Saves are upserts, so sample rows would sit alongside real data;
+        # only seed them into an empty database
+        if api.has_opportunities():
+            return 0
+        return len(create_enhanced_sample_data(api))
     
-    return df
+    logger.info("Saved %d of %d Africa-related opportunities", saved, found)
+    return saved
 
 
-def create_enhanced_sample_data() -> pd.DataFrame:
-    """Create enhanced sample data for demonstration."""
-    print("[INFO] Creating enhanced sample data")
+def create_enhanced_sample_data(api: Optional[EnhancedSAMAfricaAPI] = None, save: bool = True) -> pd.DataFrame:
+    """Create enhanced sample data for demonstration, saving it through api (default: the shared client) unless save is False."""
+    logger.info("Creating enhanced sample data")
     
     sample_data = [
         {
@@ -493,10 +921,15 @@ def create_enhanced_sample_data() -> pd.DataFrame:
         }
     ]
     
-    api = EnhancedSAMAfricaAPI()
-    df = api.save_to_database(sample_data)
-    return df
+    if not save:
+        return pd.DataFrame(sample_data)
+    if api is None:
+        api = get_api()
+    if not api.save_to_database(sample_data, replace_samples=False):
+        return pd.DataFrame()
+    return pd.DataFrame(sample_data)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=LOG_LEVEL, format=LOG_FORMAT)
     update_comprehensive_africa_data()
\ No newline at end of file